@@ -32,16 +32,116 @@ EasyBuild support for building and installing the libsmm library, implemented as
 @author: Jens Timmerman (Ghent University)
 """
 
+import glob
+import hashlib
+import itertools
+import json
+import math
 import os
+import re
+from multiprocessing.pool import ThreadPool
 from easybuild.tools import LooseVersion
 
 import easybuild.tools.toolchain as toolchain
 from easybuild.framework.easyblock import EasyBlock
 from easybuild.framework.easyconfig import CUSTOM
-from easybuild.tools.build_log import EasyBuildError
-from easybuild.tools.filetools import copy_dir
-from easybuild.tools.modules import get_software_version
+from easybuild.tools.build_log import EasyBuildError, print_warning
+from easybuild.tools.filetools import copy_dir, copy_file, mkdir, read_file, which, write_file
+from easybuild.tools.modules import get_software_root, get_software_version
 from easybuild.tools.run import run_cmd
+from easybuild.tools.systemtools import get_cpu_features, get_cpu_model, get_cpu_vendor
+
+# default matrix dimensions for which routines are generated
+DEFAULT_DIMS = (1, 4, 5, 6, 9, 13, 16, 17, 22)
+DEFAULT_MAX_TINY_DIM = 12
+
+CPU_CACHE_SYSFS_PATH = '/sys/devices/system/cpu/cpu0/cache'
+
+
+def det_l1d_cache_size(cache_path=CPU_CACHE_SYSFS_PATH):
+    """
+    Determine size of L1 data cache (in bytes), based on index*/{level,type,size} files in specified sysfs directory.
+    Returns None if the L1 data cache size could not be determined.
+    """
+    for index_dir in sorted(glob.glob(os.path.join(cache_path, 'index*'))):
+        level = read_file(os.path.join(index_dir, 'level'), log_error=False)
+        cache_type = read_file(os.path.join(index_dir, 'type'), log_error=False)
+        size = read_file(os.path.join(index_dir, 'size'), log_error=False)
+        if level is None or cache_type is None or size is None:
+            continue
+
+        if level.strip() == '1' and cache_type.strip() in ('Data', 'Unified'):
+            res = re.match(r'^([0-9]+)([KMG]?)$', size.strip())
+            if res:
+                multiplier = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}[res.group(2)]
+                return int(res.group(1)) * multiplier
+
+    return None
+
+
+def det_max_tiny_dim(l1d_size):
+    """
+    Determine maximum tiny dimension for specified L1 data cache size (in bytes), clamped to [8, 16].
+
+    Three tiny double precision matrices should fit in about 1/9th of the L1 data cache, which yields
+    the default maximum tiny dimension (12) for a 32KiB L1 data cache, 8 for 16KiB, 15 for 48KiB, and 16 for 64KiB.
+    """
+    max_tiny_dim = int(math.sqrt(l1d_size / (9 * 3 * 8)))
+    return min(max(max_tiny_dim, 8), 16)
+
+
+def gen_libxsmm_dispatcher(label, dims):
+    """
+    Generate Fortran source code for smm_<label>nn routine, which provides the same interface as libsmm does:
+    it dispatches to the libxsmm-generated kernel for the specified M, N, K (if any), and falls back to BLAS otherwise.
+    """
+    if max(dims) >= 1000:
+        raise EasyBuildError("Matrix dimensions for libxsmm backend must be smaller than 1000: %s", dims)
+
+    routine = 'smm_%snn' % label
+    blas_routine = {'d': 'DGEMM'}[label]
+    kernels = ['%s_%s_%s_%s' % (routine, m, n, k) for (m, n, k) in itertools.product(dims, repeat=3)]
+
+    lines = [
+        "! This file was generated by EasyBuild",
+        "SUBROUTINE %s(M, N, K, A, B, C)" % routine,
+        "  USE, INTRINSIC :: ISO_C_BINDING, ONLY: C_DOUBLE",
+        "  IMPLICIT NONE",
+        "  INTEGER :: M, N, K",
+        "  REAL(KIND=C_DOUBLE) :: A(*), B(*), C(*)",
+        "  INTERFACE",
+    ]
+    for kernel in kernels:
+        lines.extend([
+            "    SUBROUTINE %s(A, B, C) BIND(C)" % kernel,
+            "      IMPORT :: C_DOUBLE",
+            "      REAL(KIND=C_DOUBLE) :: A(*), B(*), C(*)",
+            "    END SUBROUTINE %s" % kernel,
+        ])
+    blas_call = "CALL %s('N', 'N', M, N, K, 1.0_C_DOUBLE, A, M, B, K, 1.0_C_DOUBLE, C, M)" % blas_routine
+
+    # sizes are encoded as a single integer to select the kernel, which is only unique (and doesn't overflow)
+    # if each of M, N, K are smaller than 1000, so always use BLAS for larger sizes
+    lines.extend([
+        "  END INTERFACE",
+        "  IF (M < 1000 .AND. N < 1000 .AND. K < 1000) THEN",
+        "    SELECT CASE ((M * 1000 + N) * 1000 + K)",
+    ])
+    for ((m, n, k), kernel) in zip(itertools.product(dims, repeat=3), kernels):
+        lines.extend([
+            "    CASE (%d)" % ((m * 1000 + n) * 1000 + k),
+            "      CALL %s(A, B, C)" % kernel,
+        ])
+    lines.extend([
+        "    CASE DEFAULT",
+        "      " + blas_call,
+        "    END SELECT",
+        "  ELSE",
+        "    " + blas_call,
+        "  END IF",
+        "END SUBROUTINE %s" % routine,
+    ])
+    return '\n'.join(lines) + '\n'
 
 
 class EB_libsmm(EasyBlock):
@@ -53,15 +153,31 @@ class EB_libsmm(EasyBlock):
 
     @staticmethod
     def extra_options():
-        # default dimensions
-        dd = [1, 4, 5, 6, 9, 13, 16, 17, 22]
         extra_vars = {
             'transpose_flavour': [1, "Transpose flavour of routines", CUSTOM],
-            'max_tiny_dim': [12, "Maximum tiny dimension", CUSTOM],
-            'dims': [dd, "Generate routines for these matrix dims", CUSTOM],
+            'max_tiny_dim': [DEFAULT_MAX_TINY_DIM, "Maximum tiny dimension", CUSTOM],
+            # use a fresh list, since value of easyconfig parameters may be modified in place
+            'dims': [list(DEFAULT_DIMS), "Generate routines for these matrix dims", CUSTOM],
+            'datatypes': [['d', 'z'], "libsmm datatypes to build; subset of d (real), z (complex)", CUSTOM],
+            'use_libxsmm_backend': [False, "Generate double precision real NN kernels with libxsmm_gemm_generator "
+                                           "rather than via exhaustive search (requires LIBXSMM dependency)", CUSTOM],
+            'pgo': [False, "Do a two-pass profile-guided optimization (PGO) build of libsmm", CUSTOM],
+            'reuse_tuning': [False, "Reuse (and store) results of libsmm kernel search across installations", CUSTOM],
+            'clean_build_dir': [False, "Clean build directories (using do_clean) before installing", CUSTOM],
+            'mpi_parallel_autotune': [False, "Run builds for different datatypes on separate nodes when running in "
+                                             "a multi-node Slurm job (one node per datatype, so at most 2 nodes; "
+                                             "the kernel search itself is not split across nodes); "
+                                             "requires build directory to be on a shared filesystem", CUSTOM],
+            'autotune_tiny': [False, "Determine maximum tiny dimension based on L1 data cache size of host "
+                                     "(in range [8, 16], values larger than 12 make the build take longer)", CUSTOM],
         }
         return EasyBlock.extra_options(extra_vars)
 
+    def __init__(self, *args, **kwargs):
+        """Initialize libsmm-specific variables."""
+        super(EB_libsmm, self).__init__(*args, **kwargs)
+        self.libsmm_build_dirs = []
+
     def configure_step(self):
         """Configure build: change to tools/build_libsmm dir"""
         try:
@@ -71,6 +187,87 @@ class EB_libsmm(EasyBlock):
         except OSError as err:
             raise EasyBuildError("Failed to change to directory %s: %s", dst, err)
 
+    def autotune_max_tiny_dim(self):
+        """
+        Determine maximum tiny dimension based on size of L1 data cache,
+        such that 3 tiny double precision matrices fit comfortably in it.
+        Result is cached (per CPU model) in a JSON file next to the installation directory.
+        """
+        cpu_key = '%s - %s' % (get_cpu_vendor(), get_cpu_model())
+        cache_path = os.path.join(os.path.dirname(self.installdir), 'libsmm_autotune.json')
+
+        cache = {}
+        if os.path.exists(cache_path):
+            try:
+                cache = json.loads(read_file(cache_path))
+            except ValueError as err:
+                self.log.warning("Ignoring corrupt libsmm autotune cache %s: %s", cache_path, err)
+
+        if cpu_key in cache:
+            max_tiny_dim = cache[cpu_key]
+            self.log.info("Using cached maximum tiny dimension for %s: %s", cpu_key, max_tiny_dim)
+        else:
+            l1d_size = det_l1d_cache_size()
+            if not l1d_size:
+                print_warning("Failed to determine L1 data cache size via %s, not autotuning maximum tiny dimension",
+                              CPU_CACHE_SYSFS_PATH)
+                return self.cfg['max_tiny_dim']
+
+            max_tiny_dim = det_max_tiny_dim(l1d_size)
+            self.log.info("Maximum tiny dimension for %s based on L1 data cache size of %s bytes: %s "
+                          "(capped to range [8, 16], values larger than 12 make the build take longer)",
+                          cpu_key, l1d_size, max_tiny_dim)
+
+            cache[cpu_key] = max_tiny_dim
+            write_file(cache_path, json.dumps(cache, indent=4, sort_keys=True))
+
+        return max_tiny_dim
+
+    def build_libxsmm_kernels(self, build_dir, label, cc_cmd, fc_cmd):
+        """
+        Generate NN kernels for all combinations of dims using libxsmm_gemm_generator,
+        and archive them together with a dispatcher routine that provides the libsmm interface.
+        """
+
+        if not get_software_root('LIBXSMM'):
+            raise EasyBuildError("LIBXSMM is required as a dependency when use_libxsmm_backend is enabled")
+
+        kernels_dir = os.path.join(build_dir, 'libxsmm_kernels')
+        mkdir(kernels_dir)
+
+        self.log.info("Generating NN kernels with libxsmm in %s..." % kernels_dir)
+        for (m, n, k) in itertools.product(self.cfg['dims'], repeat=3):
+            name = 'smm_%snn_%s_%s_%s' % (label, m, n, k)
+            # C = C + A * B with column-major A (MxK), B (KxN), C (MxN);
+            # generate plain C code ('noarch'), which is vectorized by the compiler for the host CPU
+            cmd = "libxsmm_gemm_generator dense %s.c %s %s %s %s %s %s %s 1 1 0 0 noarch nopf DP" % (
+                name, name, m, n, k, m, k, m)
+            run_cmd(cmd, path=kernels_dir)
+
+        run_cmd("%s -c *.c" % cc_cmd, path=kernels_dir)
+
+        # smm_<label>nn routine which dispatches to the generated kernels, with fallback to BLAS
+        dispatcher = 'smm_%snn.f90' % label
+        write_file(os.path.join(kernels_dir, dispatcher), gen_libxsmm_dispatcher(label, self.cfg['dims']))
+        run_cmd("%s -c %s" % (fc_cmd, dispatcher), path=kernels_dir)
+
+        libdir = os.path.join(build_dir, 'lib')
+        mkdir(libdir)
+        run_cmd("ar rcs %s %s" % (os.path.join(libdir, 'libsmm_%snn.a' % label), os.path.join(kernels_dir, '*.o')))
+
+    def tuning_archive_path(self, label, cfg_txt):
+        """
+        Determine path to archive of libsmm tuning results (run_* directories) for specified datatype,
+        which are only valid for the same libsmm version, compiler (version), type of CPU,
+        and libsmm configuration (incl. compiler command).
+        """
+        comp_name = self.toolchain.COMPILER_MODULE_NAME[0]
+        compiler = '%s %s %s' % (self.toolchain.comp_family(), comp_name, get_software_version(comp_name))
+        # don't hash /proc/cpuinfo as a whole, since it includes the (fluctuating) current CPU frequency
+        key = [self.version, compiler, get_cpu_vendor(), get_cpu_model(), ' '.join(get_cpu_features()), cfg_txt]
+        signature = hashlib.sha256('\n'.join(key).encode()).hexdigest()[:12]
+        return os.path.join(os.path.dirname(self.installdir), 'libsmm-tuning-%snn-%s.tar.gz' % (label, signature))
+
     def build_step(self):
         """Build libsmm
         Possible iterations over precision (single/double) and type (real/complex)
@@ -146,66 +343,226 @@ tasks=%(tasks)s
 
         """
 
-        # only GCC is supported for now
-        if self.toolchain.comp_family() == toolchain.GCC:  # @UndefinedVariable
-            hostcompile = os.getenv('F90')
+        hostcompile = os.getenv('F90')
+        if not hostcompile:
+            raise EasyBuildError("No Fortran compiler found ($F90 not set)!")
+        comp_fam = self.toolchain.comp_family()
+
+        # link-time optimization option that also needs to be passed when linking
+        lto_link = ''
 
+        if comp_fam == toolchain.GCC:  # @UndefinedVariable
             # optimizations
-            opts = "-O2 -funroll-loops -ffast-math -ftree-vectorize -march=native -fno-inline-functions"
+            # -Ofast implies -ffast-math, and is required to get vectorized (AVX) code for the tiny matmul kernels;
+            # keep -fno-inline-functions, since the libsmm driver benchmarks separate kernel bodies
+            opts = "-Ofast -funroll-loops -ftree-vectorize -march=native -fno-inline-functions"
 
             # Depending on the get_version, we need extra options
             extra = ''
             gccVersion = LooseVersion(get_software_version('GCC'))
-            if gccVersion >= LooseVersion('4.6'):
+            if gccVersion >= LooseVersion('4.9'):
+                # parallel LTO, and keep regular object code next to the LTO bytecode (for the static libraries)
+                extra = "-flto=%s -ffat-lto-objects" % self.cfg['parallel']
+                if which('ld.gold'):
+                    extra += " -fuse-linker-plugin"
+            elif gccVersion >= LooseVersion('4.6'):
                 extra = "-flto"
 
-            targetcompile = "%s %s %s" % (hostcompile, opts, extra)
+            # avoid indirection via PLT for calls into BLAS (fallback), and allow interprocedural optimizations
+            if gccVersion >= LooseVersion('5.1'):
+                opts += " -fno-semantic-interposition"
+            if gccVersion >= LooseVersion('6.1'):
+                opts += " -fno-plt"
+
+            if extra:
+                lto_link = "-flto"
+
+        elif comp_fam == toolchain.INTELCOMP:  # @UndefinedVariable
+            opts = "-O3 -xHost -fp-model fast=2 -qopt-zmm-usage=high -fno-inline-functions"
+            # no link-time optimization (-ipo), since that yields objects that only contain IR,
+            # which can not be archived in the static libsmm libraries using plain 'ar'
+            extra = ''
+
         else:
-            raise EasyBuildError("No supported compiler found (tried GCC)")
+            raise EasyBuildError("No supported compiler found (tried GCC, Intel compilers)")
+
+        if self.cfg['pgo'] and comp_fam != toolchain.GCC:  # @UndefinedVariable
+            raise EasyBuildError("PGO build of libsmm is only supported with GCC")
+
+        targetcompile = "%s %s %s" % (hostcompile, opts, extra)
 
         if not os.getenv('LIBBLAS'):
             raise EasyBuildError("No BLAS library specifications found (LIBBLAS not set)!")
 
+        max_tiny_dim = self.cfg['max_tiny_dim']
+        if self.cfg['autotune_tiny']:
+            max_tiny_dim = self.autotune_max_tiny_dim()
+
         cfgdict = {
-            'datatype': None,
+            # datatype is filled in per build below
+            'datatype': '%(datatype)s',
             'transposeflavour': self.cfg['transpose_flavour'],
             'targetcompile': targetcompile,
             'hostcompile': hostcompile,
-            'dims': ' '.join([str(d) for d in self.cfg['dims']]),
-            'tiny_dims': ' '.join([str(d) for d in range(1, self.cfg['max_tiny_dim'] + 1)]),
+            'dims': ' '.join(map(str, self.cfg['dims'])),
+            'tiny_dims': ' '.join(map(str, range(1, max_tiny_dim + 1))),
             'tasks': self.cfg['parallel'],
-            'LIBBLAS': "%s %s" % (os.getenv('LDFLAGS'), os.getenv('LIBBLAS'))
+            'LIBBLAS': "%s -Wl,-Bsymbolic-functions %s" % (os.getenv('LDFLAGS'), os.getenv('LIBBLAS'))
         }
+        # make sure link-time optimization is also done when linking
+        if lto_link:
+            cfgdict['LIBBLAS'] += " %s" % lto_link
 
         # configure for various iterations
-        datatypes = [(1, 'double precision real'), (3, 'double precision complex')]
-
-        for (dt, descr) in datatypes:
-            cfgdict['datatype'] = dt
+        all_datatypes = [(1, 'd', 'double precision real'), (3, 'z', 'double precision complex')]
+        supported_labels = [x[1] for x in all_datatypes]
+        unsupported = [x for x in self.cfg['datatypes'] if x not in supported_labels]
+        if unsupported or not self.cfg['datatypes']:
+            raise EasyBuildError("Unsupported or no datatypes specified: %s (supported: %s)",
+                                 self.cfg['datatypes'], ', '.join(supported_labels))
+        datatypes = [x for x in all_datatypes if x[1] in self.cfg['datatypes']]
+
+        # NN kernels for double precision real can be generated directly with libxsmm,
+        # other datatypes and transpose flavours still require the exhaustive search done by libsmm
+        libxsmm_labels = []
+        if self.cfg['use_libxsmm_backend']:
+            if self.cfg['transpose_flavour'] == 1:
+                libxsmm_labels = [x[1] for x in datatypes if x[1] == 'd']
+            else:
+                self.log.warning("libxsmm backend only supports transpose flavour 1 (NN), not using it")
+
+        # each datatype is built in a separate copy of the build directory, so they can be built in parallel;
+        # when running in a multi-node Slurm job, each build can be run on a separate node (with all cores);
+        # otherwise, available cores are split across the different builds, to avoid oversubscription
+        do_all_cmd = "./do_all"
+        slurm_nnodes = int(os.environ.get('SLURM_NNODES', 1))
+        if self.cfg['mpi_parallel_autotune'] and slurm_nnodes > 1:
+            # builds (and PGO profiles) are located in the build directory, which must be accessible on all nodes
+            for local_path in ('/tmp', '/dev/shm'):
+                if os.path.realpath(self.builddir).startswith(local_path + os.path.sep):
+                    raise EasyBuildError("Build directory %s is node-local, can not use mpi_parallel_autotune; "
+                                         "use a build path on a shared filesystem (see --buildpath)", self.builddir)
+            print_warning("Running libsmm builds for different datatypes on separate nodes of Slurm job, "
+                          "build directory %s must be on a shared filesystem", self.builddir)
+            self.log.info("Distributing libsmm builds across %s nodes of Slurm job (one per datatype)",
+                          min(slurm_nnodes, len(datatypes) - len(libxsmm_labels)))
+            cfgdict['tasks'] = self.cfg['parallel']
+            do_all_cmd = "srun --nodes=1 --ntasks=1 --cpus-per-task=%s --exclusive ./do_all" % self.cfg['parallel']
+        else:
+            cfgdict['tasks'] = max(1, self.cfg['parallel'] // max(1, len(datatypes) - len(libxsmm_labels)))
+
+        # only the datatype (and target compile command, when doing a PGO build) differ between the config files,
+        # so do the bulk of the templating only once
+        cfgdict['targetcompile'] = '%(targetcompile)s'
+        base_txt = cfg_tpl % cfgdict
+
+        search_builds = []
+        for (dt, label, descr) in datatypes:
+            build_dir = os.path.join(os.path.dirname(os.getcwd()), 'build_%snn' % label)
+            copy_dir('.', build_dir)
+            self.libsmm_build_dirs.append(build_dir)
+
+            if label in libxsmm_labels:
+                self.build_libxsmm_kernels(build_dir, label, "%s %s %s" % (os.getenv('CC'), opts, extra),
+                                           targetcompile)
+            else:
+                search_builds.append((build_dir, dt, label, descr))
+
+        def write_config(build_dir, dt, descr, target_compile):
+            """Write config file for specified datatype in specified build directory, return its contents."""
+            cfg_path = os.path.join(build_dir, fn)
+            txt = base_txt % {'datatype': dt, 'targetcompile': target_compile}
+            write_file(cfg_path, txt)
+            self.log.debug("config file %s for datatype %s ('%s'): %s" % (cfg_path, dt, descr, txt))
+            return txt
+
+        def build_datatype(build):
+            """Build libsmm for a single datatype in the specified build directory."""
+            (build_dir, dt, label, descr) = build
+
+            def run_in_build_dir(cmd):
+                """
+                Run command in build directory; don't use run_cmd's 'path' option for this, since that changes
+                the working directory of the whole process, which interferes with builds running in other threads
+                """
+                run_cmd("cd %s && %s" % (build_dir, cmd))
+
+            if self.cfg['pgo']:
+                # first pass: instrumented build, the benchmarking done by libsmm is used as training run
+                pgo_dir = os.path.join(self.builddir, 'pgo', label)
+                mkdir(pgo_dir, parents=True)
+                write_config(build_dir, dt, descr, "%s -fprofile-generate=%s" % (targetcompile, pgo_dir))
+                self.log.info("Building in %s with profiling enabled (PGO training run)..." % build_dir)
+                run_in_build_dir("./do_clean")
+                run_in_build_dir(do_all_cmd)
+
+                pgo_data_size = 0
+                for (dirpath, _, filenames) in os.walk(pgo_dir):
+                    pgo_data_size += sum(os.path.getsize(os.path.join(dirpath, x)) for x in filenames)
+                if pgo_data_size < 10 * 1024 ** 2:
+                    print_warning("Only %d bytes of PGO data found in %s, training data may be too sparse",
+                                  pgo_data_size, pgo_dir)
+
+                # second pass: rebuild using the collected profiles
+                txt = write_config(build_dir, dt, descr,
+                                   "%s -fprofile-use=%s -fprofile-correction" % (targetcompile, pgo_dir))
+            else:
+                txt = write_config(build_dir, dt, descr, targetcompile)
+
+            self.log.info("Building in %s..." % build_dir)
+            run_in_build_dir("./do_clean")
+
+            if self.cfg['reuse_tuning']:
+                tuning_archive = self.tuning_archive_path(label, txt)
+                if os.path.exists(tuning_archive):
+                    self.log.info("Reusing libsmm tuning results from %s", tuning_archive)
+                    run_in_build_dir("tar xzf %s" % tuning_archive)
+
+            run_in_build_dir(do_all_cmd)
+
+            if self.cfg['reuse_tuning']:
+                run_dirs = [os.path.basename(x) for x in glob.glob(os.path.join(build_dir, 'run_*'))]
+                if run_dirs:
+                    self.log.info("Storing libsmm tuning results in %s", tuning_archive)
+                    run_in_build_dir("tar czf %s %s" % (tuning_archive, ' '.join(run_dirs)))
+
+        if search_builds:
+            pool = ThreadPool(len(search_builds))
             try:
-                txt = cfg_tpl % cfgdict
-                f = open(fn, 'w')
-                f.write(txt)
-                f.close()
-                self.log.debug("config file %s for datatype %s ('%s'): %s" % (fn, dt, descr, txt))
-            except IOError as err:
-                raise EasyBuildError("Failed to write %s: %s", fn, err)
-
-            self.log.info("Building for datatype %s ('%s')..." % (dt, descr))
-            run_cmd("./do_clean")
-            run_cmd("./do_all")
+                pool.map(build_datatype, search_builds)
+            finally:
+                pool.close()
+                pool.join()
 
     def install_step(self):
-        """Install CP2K: clean, and copy lib directory to install dir"""
-
-        run_cmd("./do_clean")
-        copy_dir('lib', os.path.join(self.installdir, 'lib'))
+        """Install libsmm: copy lib directory of each build to install dir (in parallel)"""
+
+        # cleaning the build directories is not required, since object files are not located in lib/
+        if self.cfg['clean_build_dir']:
+            for build_dir in self.libsmm_build_dirs:
+                run_cmd("./do_clean", path=build_dir)
+
+        libdir = os.path.join(self.installdir, 'lib')
+        to_copy = []
+        for build_dir in self.libsmm_build_dirs:
+            build_libdir = os.path.join(build_dir, 'lib')
+            for (dirpath, _, filenames) in os.walk(build_libdir):
+                target_dir = os.path.join(libdir, os.path.relpath(dirpath, build_libdir))
+                mkdir(target_dir, parents=True)
+                to_copy.extend((os.path.join(dirpath, x), os.path.join(target_dir, x)) for x in filenames)
+
+        pool = ThreadPool(max(1, self.cfg['parallel']))
+        try:
+            pool.map(lambda paths: copy_file(*paths), to_copy)
+        finally:
+            pool.close()
+            pool.join()
 
     def sanity_check_step(self):
         """Custom sanity check for libsmm"""
 
         custom_paths = {
-            'files': ["lib/libsmm_%s.a" % x for x in ["dnn", "znn"]],
+            'files': ["lib/libsmm_%snn.a" % x for x in self.cfg['datatypes']],
             'dirs': [],
         }
 
@@ -38,16 +38,23 @@ from easybuild.tools.build_log import EasyBuildError, print_msg
 from easybuild.tools.filetools import change_dir
 from easybuild.tools.modules import get_software_libdir, get_software_root
 
+_V47 = LooseVersion('4.7')
+
 
 class EB_Paraver(ConfigureMake):
     """Support for building/installing Paraver."""
 
+    def __init__(self, *args, **kwargs):
+        """Initialize Paraver-specific variables."""
+        super(EB_Paraver, self).__init__(*args, **kwargs)
+        self.loosever = LooseVersion(self.version)
+
     def run_all_steps(self, *args, **kwargs):
         """
         Put configure/build/install options in place for the 3 different components of Paraver.
         Each component lives in a separate subdirectory.
         """
-        if LooseVersion(self.version) < LooseVersion('4.7'):
+        if self.loosever < _V47:
 
             # leverage support for iterated installation for older Paraver versions
             self.components = ['ptools_common_files', 'paraver-kernel', 'wxparaver']
@@ -88,7 +95,7 @@ class EB_Paraver(ConfigureMake):
         wxwidgets = get_software_root('wxWidgets')
         if wxwidgets:
             wx_config = os.path.join(wxwidgets, 'bin', 'wx-config')
-        elif LooseVersion(self.version) >= LooseVersion('4.7'):
+        elif self.loosever >= _V47:
             raise EasyBuildError("wxWidgets is not available as a dependency")
 
         # determine value to pass to --with-wxpropgrid (library name)
@@ -107,7 +114,7 @@ class EB_Paraver(ConfigureMake):
         else:
             self.log.info("wxPropertyGrid not included as dependency, assuming that's OK...")
 
-        if LooseVersion(self.version) < LooseVersion('4.7'):
+        if self.loosever < _V47:
             component = self.components[self.current_component]
             change_dir(component)
             self.log.info("Customized start directory for component %s: %s", component, os.getcwd())
@@ -132,14 +139,14 @@ class EB_Paraver(ConfigureMake):
     def build_step(self):
         """Custom build procedure for Paraver: skip 'make' for recent versions."""
 
-        if LooseVersion(self.version) < LooseVersion('4.7'):
+        if self.loosever < _V47:
             super(EB_Paraver, self).build_step()
 
     def install_step(self):
         """Custom installation procedure for Paraver: put symlink in place for library subdirectory."""
         super(EB_Paraver, self).install_step()
 
-        if LooseVersion(self.version) < LooseVersion('4.7'):
+        if self.loosever < _V47:
             # link lib to lib64 if needed
             # this is a workaround for an issue with libtool which sometimes creates lib64 rather than lib
             if self.components[self.current_component] == self.components[0]:
@@ -33,15 +33,42 @@ implemented as an easyblock.
 @author: Christian Feld (Juelich Supercomputing Centre)
 """
 import os
+import re
 
 import easybuild.tools.toolchain as toolchain
 from easybuild.easyblocks.generic.configuremake import ConfigureMake
 from easybuild.tools import LooseVersion
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.environment import unset_env_vars
-from easybuild.tools.filetools import apply_regex_substitutions
+from easybuild.tools.filetools import copy_file, read_file, write_file
 from easybuild.tools.modules import get_software_root, get_software_libdir
 
+_V0 = LooseVersion('0')
+_V80 = LooseVersion('8.0')
+_V85 = LooseVersion('8.5')
+
+# first version of each package that supports --with-nocross-compiler-suite=nvhpc (older versions use 'pgi')
+_NVHPC_SINCE = {
+    'Score-P': LooseVersion('8.0'),
+    'Scalasca': LooseVersion('2.6.1'),
+    'OTF2': LooseVersion('3.0.2'),
+    'CubeWriter': LooseVersion('4.8'),
+    'CubeLib': LooseVersion('4.8'),
+    'CubeGUI': LooseVersion('4.8'),
+}
+
+# patterns (and replacements) to fix configure scripts of Score-P 8.x, see EB_Score_minus_P.configure_step
+_YES_NO_RE = re.compile(r'(\*yes\*\|\*no\*)|(_lib\}\$\{with_)')
+_YES_NO_REPL = {
+    1: 'yes,*|no,*|*,yes|*,no',
+    2: '_lib},${with_',
+}
+
+
+def _yes_no_repl(match):
+    """Return replacement for a match of _YES_NO_RE, depending on which of the patterns matched."""
+    return _YES_NO_REPL[match.lastindex]
+
 
 class EB_Score_minus_P(ConfigureMake):
     """
@@ -49,23 +76,28 @@ class EB_Score_minus_P(ConfigureMake):
     and Score-P).
     """
 
+    def __init__(self, *args, **kwargs):
+        """Initialize Score-P-specific variables."""
+        super(EB_Score_minus_P, self).__init__(*args, **kwargs)
+        self.loosever = LooseVersion(self.version)
+
     def configure_step(self, *args, **kwargs):
         """Configure the build, set configure options for compiler, MPI and dependencies."""
 
-        if LooseVersion(self.version) >= LooseVersion('8.0') and LooseVersion(self.version) < LooseVersion('8.5'):
+        if _V80 <= self.loosever < _V85:
             # Fix an issue where the configure script would fail if certain dependencies are installed in a path
             # that includes "yes" or "no", see https://gitlab.com/score-p/scorep/-/issues/1008.
-            yes_no_regex = [
-                (r'\*yes\*\|\*no\*', 'yes,*|no,*|*,yes|*,no'),
-                (r'_lib}\${with_', '_lib},${with_'),
-            ]
-            configure_scripts = [
-                os.path.join(self.start_dir, 'build-backend', 'configure'),
-                os.path.join(self.start_dir, 'build-mpi', 'configure'),
-                os.path.join(self.start_dir, 'build-shmem', 'configure'),
-            ]
+            # not all configure scripts are present for all packages (e.g., no build-mpi for non-MPI builds)
+            configure_scripts = [os.path.join(self.start_dir, subdir, 'configure')
+                                 for subdir in ('build-backend', 'build-mpi', 'build-shmem')]
+            configure_scripts = [x for x in configure_scripts if os.path.isfile(x)]
             for configure_script in configure_scripts:
-                apply_regex_substitutions(configure_script, yes_no_regex)
+                txt, count = _YES_NO_RE.subn(_yes_no_repl, read_file(configure_script))
+                self.log.info("Made %d substitution(s) in %s to fix yes/no detection", count, configure_script)
+                if count:
+                    # keep backup of original file, like apply_regex_substitutions does
+                    copy_file(configure_script, configure_script + '.orig.eb')
+                    write_file(configure_script, txt)
 
         # Remove some settings from the environment, as they interfere with
         # Score-P's configure magic...
@@ -92,15 +124,7 @@ class EB_Score_minus_P(ConfigureMake):
                 toolchain.NVHPC: 'nvhpc',
                 toolchain.PGI: 'pgi',
             }
-            nvhpc_since = {
-                'Score-P': '8.0',
-                'Scalasca': '2.6.1',
-                'OTF2': '3.0.2',
-                'CubeWriter': '4.8',
-                'CubeLib': '4.8',
-                'CubeGUI': '4.8',
-            }
-            if LooseVersion(self.version) < LooseVersion(nvhpc_since.get(self.name, '0')):
+            if self.loosever < _NVHPC_SINCE.get(self.name, _V0):
                 comp_opts[toolchain.NVHPC] = 'pgi'
 
             comp_fam = self.toolchain.comp_family()
@@ -147,31 +171,31 @@ class EB_Score_minus_P(ConfigureMake):
         # Notes:
         #   - binutils: Pass include/lib directories separately, as different directory layouts may break Score-P's
         #               configure, see https://github.com/geimer/easybuild-easyblocks/pull/4#issuecomment-219284755
+        #   - libdir of binutils/PAPI is only determined when the dependency is actually available
         deps = {
-            'binutils': ['--with-libbfd-include=%s/include',
-                         '--with-libbfd-lib=%%s/%s' % get_software_libdir('binutils', fs=['libbfd.a'])],
-            'libunwind': ['--with-libunwind=%s'],
+            'binutils': lambda root: [
+                '--with-libbfd-include=%s/include' % root,
+                '--with-libbfd-lib=%s/%s' % (root, get_software_libdir('binutils', fs=['libbfd.a'])),
+            ],
+            'libunwind': lambda root: ['--with-libunwind=%s' % root],
             # Older versions use Cube
-            'Cube': ['--with-cube=%s/bin'],
+            'Cube': lambda root: ['--with-cube=%s/bin' % root],
             # Recent versions of Cube are split into CubeLib and CubeW(riter)
-            'CubeLib': ['--with-cubelib=%s/bin'],
-            'CubeWriter': ['--with-cubew=%s/bin'],
-            'CUDA': ['--enable-cuda', '--with-libcudart=%s'],
-            'OTF2': ['--with-otf2=%s/bin'],
-            'OPARI2': ['--with-opari2=%s/bin'],
-            'PAPI': ['--with-papi-header=%s/include', '--with-papi-lib=%%s/%s' % get_software_libdir('PAPI')],
-            'PDT': ['--with-pdt=%s/bin'],
-            'Qt': ['--with-qt=%s'],
-            'SIONlib': ['--with-sionlib=%s/bin'],
+            'CubeLib': lambda root: ['--with-cubelib=%s/bin' % root],
+            'CubeWriter': lambda root: ['--with-cubew=%s/bin' % root],
+            'CUDA': lambda root: ['--enable-cuda', '--with-libcudart=%s' % root],
+            'OTF2': lambda root: ['--with-otf2=%s/bin' % root],
+            'OPARI2': lambda root: ['--with-opari2=%s/bin' % root],
+            'PAPI': lambda root: ['--with-papi-header=%s/include' % root,
+                                  '--with-papi-lib=%s/%s' % (root, get_software_libdir('PAPI'))],
+            'PDT': lambda root: ['--with-pdt=%s/bin' % root],
+            'Qt': lambda root: ['--with-qt=%s' % root],
+            'SIONlib': lambda root: ['--with-sionlib=%s/bin' % root],
         }
-        for (dep_name, dep_opts) in deps.items():
-            dep_root = get_software_root(dep_name)
-            if dep_root:
-                for dep_opt in dep_opts:
-                    try:
-                        dep_opt = dep_opt % dep_root
-                    except TypeError:
-                        pass  # Ignore subtitution error when there is nothing to substitute
-                    self.cfg.update('configopts', dep_opt)
+        dep_roots = dict((dep_name, get_software_root(dep_name)) for dep_name in deps)
+        loaded_deps = dict((dep_name, dep_root) for (dep_name, dep_root) in dep_roots.items() if dep_root)
+        for (dep_name, dep_root) in loaded_deps.items():
+            for dep_opt in deps[dep_name](dep_root):
+                self.cfg.update('configopts', dep_opt)
 
         super(EB_Score_minus_P, self).configure_step(*args, **kwargs)
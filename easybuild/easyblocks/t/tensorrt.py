@@ -28,7 +28,6 @@ EasyBuild support for building and installing TensorRT, implemented as an easybl
 @author: Ake Sandgren (Umea University)
 @author: Maxime Boissonneault (Universite Laval, Compute Canada)
 """
-import glob
 import os
 from easybuild.tools import LooseVersion
 
@@ -96,30 +95,41 @@ class EB_TensorRT(PythonPackage, Binary):
         super(EB_TensorRT, self).extensions_step()
 
         pyver = ''.join(get_software_version('Python').split('.')[:2])
+        # (subdirectory, prefix, suffix) of wheel files to install
         whls = [
-            os.path.join('graphsurgeon', 'graphsurgeon-*-py2.py3-none-any.whl'),
-            os.path.join('uff', 'uff-*-py2.py3-none-any.whl'),
-            os.path.join('python', 'tensorrt-%s-cp%s-*-linux_x86_64.whl' % (self.version, pyver)),
+            ('graphsurgeon', 'graphsurgeon-', '-py2.py3-none-any.whl'),
+            ('uff', 'uff-', '-py2.py3-none-any.whl'),
+            ('python', 'tensorrt-%s-cp%s-' % (self.version, pyver), '-linux_x86_64.whl'),
         ]
-        for whl in whls:
-            whl_paths = glob.glob(os.path.join(self.installdir, whl))
-            if len(whl_paths) == 1:
-                cmd = PIP_INSTALL_CMD % {
-                    'installopts': self.cfg['installopts'],
-                    'loc': whl_paths[0],
-                    'prefix': self.installdir,
-                    'python': self.python_cmd,
-                }
-
-                # Use --no-deps to prevent pip from downloading & installing
-                # any dependencies. They should be listed as extensions in
-                # the easyconfig.
-                # --ignore-installed is required to ensure *this* wheel is installed
-                cmd += " --ignore-installed --no-deps"
-
-                run_cmd(cmd, log_all=True, simple=True, log_ok=True)
+        whl_paths = []
+        for (subdir, prefix, suffix) in whls:
+            whl_dir = os.path.join(self.installdir, subdir)
+            try:
+                paths = [os.path.join(whl_dir, x) for x in os.listdir(whl_dir)
+                         if x.startswith(prefix) and x.endswith(suffix)]
+            except OSError as err:
+                raise EasyBuildError("Failed to list contents of %s: %s", whl_dir, err)
+
+            if len(paths) == 1:
+                whl_paths.append(paths[0])
             else:
-                raise EasyBuildError("Failed to isolate .whl in %s: %s", whl_paths, self.installdir)
+                raise EasyBuildError("Failed to isolate %s*%s in %s: %s", prefix, suffix, whl_dir, paths)
+
+        # install all wheels with a single pip command
+        cmd = PIP_INSTALL_CMD % {
+            'installopts': self.cfg['installopts'],
+            'loc': ' '.join(whl_paths),
+            'prefix': self.installdir,
+            'python': self.python_cmd,
+        }
+
+        # Use --no-deps to prevent pip from downloading & installing
+        # any dependencies. They should be listed as extensions in
+        # the easyconfig.
+        # --ignore-installed is required to ensure *these* wheels are installed
+        cmd += " --ignore-installed --no-deps"
+
+        run_cmd(cmd, log_all=True, simple=True, log_ok=True)
 
     def sanity_check_step(self):
         """Custom sanity check for TensorRT."""
@@ -41,6 +41,7 @@ import easybuild.easyblocks.generic.pythonpackage as pythonpackage
 from easybuild.base.testing import TestCase
 from easybuild.easyblocks.generic.cmakemake import det_cmake_version
 from easybuild.easyblocks.generic.toolchain import Toolchain
+from easybuild.easyblocks.libsmm import det_l1d_cache_size, det_max_tiny_dim, gen_libxsmm_dispatcher
 from easybuild.framework.easyblock import EasyBlock, get_easyblock_instance
 from easybuild.framework.easyconfig.easyconfig import process_easyconfig
 from easybuild.tools import config
@@ -266,6 +267,63 @@ class EasyBlockSpecificTest(TestCase):
         """))
         self.assertEqual(det_cmake_version(), '1.2.3-rc4')
 
+    def test_libsmm_det_max_tiny_dim(self):
+        """Tests for det_l1d_cache_size and det_max_tiny_dim functions provided along with libsmm easyblock."""
+
+        # no cache info available
+        self.assertEqual(det_l1d_cache_size(os.path.join(self.tmpdir, 'doesnotexist')), None)
+
+        cache_info = [
+            ('1', 'Instruction', '64K'),
+            ('1', 'Data', '48K'),
+            ('2', 'Unified', '2048K'),
+        ]
+        for (idx, (level, cache_type, size)) in enumerate(cache_info):
+            index_dir = os.path.join(self.tmpdir, 'index%d' % idx)
+            write_file(os.path.join(index_dir, 'level'), level + '\n')
+            write_file(os.path.join(index_dir, 'type'), cache_type + '\n')
+            write_file(os.path.join(index_dir, 'size'), size + '\n')
+
+        self.assertEqual(det_l1d_cache_size(self.tmpdir), 48 * 1024)
+
+        # only L2 cache info available
+        remove_dir(os.path.join(self.tmpdir, 'index0'))
+        remove_dir(os.path.join(self.tmpdir, 'index1'))
+        self.assertEqual(det_l1d_cache_size(self.tmpdir), None)
+
+        # sqrt(16 * 1024 / 216) = 8.7
+        self.assertEqual(det_max_tiny_dim(16 * 1024), 8)
+        # sqrt(32 * 1024 / 216) = 12.3, matches default
+        self.assertEqual(det_max_tiny_dim(32 * 1024), 12)
+        # sqrt(48 * 1024 / 216) = 15.1
+        self.assertEqual(det_max_tiny_dim(48 * 1024), 15)
+        # clamped to [8, 16]
+        self.assertEqual(det_max_tiny_dim(1024), 8)
+        self.assertEqual(det_max_tiny_dim(64 * 1024), 16)
+        self.assertEqual(det_max_tiny_dim(1024 ** 2), 16)
+
+    def test_libsmm_gen_libxsmm_dispatcher(self):
+        """Test gen_libxsmm_dispatcher function provided along with libsmm easyblock."""
+        txt = gen_libxsmm_dispatcher('d', [1, 4])
+
+        self.assertTrue(txt.startswith("! This file was generated by EasyBuild\n"))
+        self.assertTrue("\nSUBROUTINE smm_dnn(M, N, K, A, B, C)\n" in txt)
+        self.assertTrue(txt.endswith("END SUBROUTINE smm_dnn\n"))
+        # interface + call for each of the 2 * 2 * 2 kernels
+        self.assertEqual(txt.count(" BIND(C)\n"), 8)
+        self.assertTrue("    SUBROUTINE smm_dnn_1_4_1(A, B, C) BIND(C)\n" in txt)
+        self.assertTrue("    CASE (1004001)\n      CALL smm_dnn_1_4_1(A, B, C)\n" in txt)
+        self.assertTrue("    CASE (4004004)\n      CALL smm_dnn_4_4_4(A, B, C)\n" in txt)
+        # fallback to BLAS for other sizes
+        blas_call = "CALL DGEMM('N', 'N', M, N, K, 1.0_C_DOUBLE, A, M, B, K, 1.0_C_DOUBLE, C, M)"
+        self.assertTrue("    CASE DEFAULT\n      %s\n    END SELECT\n" % blas_call in txt)
+        # sizes >= 1000 must not be dispatched to kernels, since encoded size would not be unique
+        guard = "  IF (M < 1000 .AND. N < 1000 .AND. K < 1000) THEN\n    SELECT CASE ((M * 1000 + N) * 1000 + K)\n"
+        self.assertTrue(guard in txt)
+        self.assertTrue("  ELSE\n    %s\n  END IF\nEND SUBROUTINE smm_dnn\n" % blas_call in txt)
+
+        self.assertErrorRegex(EasyBuildError, "must be smaller than 1000", gen_libxsmm_dispatcher, 'd', [1, 1000])
+
     def test_det_py_install_scheme(self):
         """Test det_py_install_scheme function provided by PythonPackage easyblock."""
         res = pythonpackage.det_py_install_scheme(sys.executable)